@@ -0,0 +1,66 @@
+import logging
+import os
+import struct
+from typing import Optional
+
+from mlv_dump_ui.mlv import MlvClip, WavInfo
+
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+MAX_DATA_SIZE = 0xFFFFFFFF - (WAV_HEADER.size - 8)
+
+
+def wav_header(wav_info: WavInfo, data_size: int) -> bytes:
+    return WAV_HEADER.pack(
+        b"RIFF", WAV_HEADER.size - 8 + data_size, b"WAVE",
+        b"fmt ", 16, wav_info.format, wav_info.channels, wav_info.sampling_rate,
+        wav_info.bytes_per_second, wav_info.block_align, wav_info.bits_per_sample,
+        b"data", data_size
+    )
+
+
+def silence(wav_info: WavInfo, size: int) -> bytes:
+    """Returns `size` bytes of silence, rounded down to whole sample frames."""
+    size -= size % max(wav_info.block_align, 1)
+    # 8 bit PCM is unsigned, wider samples are signed
+    return (b"\x80" if wav_info.bits_per_sample <= 8 else b"\0") * size
+
+
+def extract_wav(path: str, output_path: str, logger: Optional[logging.Logger] = None) -> int:
+    """Copies the AUDF payloads of a (possibly spanned) clip into a WAV file.
+
+    Blocks are written in frame number order using the block index of `MlvClip`, so only audio
+    payloads are read. Missing block numbers are filled with silence the size of the block after
+    them, keeping the audio in sync with the video. Returns the number of audio bytes.
+    """
+    clip = MlvClip(path)
+    name = os.path.basename(path)
+    if clip.wav_info is None or not clip.audio:
+        raise ValueError(f"{name} has no audio")
+    for previous, block in zip(clip.audio, clip.audio[1:]):
+        if block.number == previous.number:
+            raise ValueError(f"{name} has more than one audio block numbered {block.number}")
+
+    expected = 0
+    data_size = 0
+    try:
+        with open(output_path, "wb") as wav:
+            wav.write(b"\0" * WAV_HEADER.size)
+            for block, payload in clip.iter_payloads(clip.audio):
+                if block.number > expected:
+                    if logger:
+                        logger.warning(
+                            f"Audio blocks {expected}-{block.number - 1} of {name} are missing, writing silence"
+                        )
+                    payload = silence(clip.wav_info, len(payload)) * (block.number - expected) + payload
+                if data_size + len(payload) > MAX_DATA_SIZE:
+                    raise ValueError(f"{name} has more audio than fits in a WAV file")
+                wav.write(payload)
+                data_size += len(payload)
+                expected = block.number + 1
+            wav.seek(0)
+            wav.write(wav_header(wav_info=clip.wav_info, data_size=data_size))
+    except BaseException:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        raise
+    return data_size
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import List, Optional, Tuple
+
+STAGING_PREFIX = ".staging-"
+# Staging directories untouched for this long were left behind by an interrupted build
+STALE_STAGING_SECONDS = 24 * 60 * 60
+
+
+def file_key(path: str) -> str:
+    """Identifies a file by its location, size and modification time."""
+    stat = os.stat(path)
+    identity = f"{os.path.realpath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(identity.encode("utf8")).hexdigest()
+
+
+class DiskCache:
+    """Directory-per-entry cache. Entries are built in a staging directory and renamed into place,
+    and the least recently used entries are evicted once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, root: str, max_bytes: Optional[int] = None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self.__remove_stale_staging()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.path_for(key)
+        if not os.path.isdir(entry):
+            return None
+        os.utime(entry)
+        return entry
+
+    def staging(self) -> str:
+        return tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self.root)
+
+    def put(self, key: str, staging: str) -> str:
+        entry = self.path_for(key)
+        with self.__lock:
+            if os.path.isdir(entry):
+                shutil.rmtree(staging, ignore_errors=True)
+            else:
+                os.replace(staging, entry)
+            os.utime(entry)
+        self.evict()
+        return entry
+
+    def discard(self, staging: str) -> None:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        with self.__lock:
+            entries = self.__entries()
+            total = sum(size for _, _, size in entries)
+            for _, entry, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+    def __remove_stale_staging(self) -> None:
+        cutoff = time.time() - STALE_STAGING_SECONDS
+        for name in os.listdir(self.root):
+            staging = os.path.join(self.root, name)
+            if name.startswith(STAGING_PREFIX) and os.path.getmtime(staging) < cutoff:
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def __entries(self) -> List[Tuple[float, str, int]]:
+        entries = []
+        for name in os.listdir(self.root):
+            entry = os.path.join(self.root, name)
+            if name.startswith(".") or not os.path.isdir(entry):
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(entry, file)) for file in os.listdir(entry)
+            )
+            entries.append((os.path.getmtime(entry), entry, size))
+        return entries
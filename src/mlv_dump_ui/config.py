@@ -1,19 +1,99 @@
 import configparser
+import logging
 import os
-from typing import Union
+import shutil
+import threading
+from typing import List, Optional, Union
 
 from flet import ThemeMode
 
+from mlv_dump_ui.jobs import ExportSettings
+
+USER_DIR = os.path.join(os.path.expanduser("~"), ".mlv_dump")
+SAVE_DELAY = 2.0
+PRESET_PREFIX = "preset:"
+
 
 class UserConfig:
     def __init__(self, root_path: str):
         self.root_path = root_path
-        self.config_file_path = os.path.join(os.path.expanduser("~"), ".mlv_dump", "mlv_dump_config.ini")
+        self.config_file_path = os.path.join(USER_DIR, "mlv_dump_config.ini")
         self.__config = None
+        self.__save_timer: Optional[threading.Timer] = None
+        self.__lock = threading.RLock()
+        self.logger = logging.getLogger("MLVDumpUI")
 
     def save(self) -> None:
-        with open(self.config_file_path, "wt", encoding="utf8") as config:
-            self.config.write(config)
+        """Writes the config to a temporary file and renames it over the old one."""
+        with self.__lock:
+            if self.__save_timer:
+                self.__save_timer.cancel()
+                self.__save_timer = None
+            config_dir = os.path.dirname(self.config_file_path)
+            os.makedirs(config_dir, exist_ok=True)
+            # Created with open() rather than mkstemp so the file gets the usual umask permissions
+            temp_path = os.path.join(config_dir, f".mlv_dump_config-{os.getpid()}.ini")
+            if os.path.exists(temp_path):
+                # Left behind by an interrupted save
+                os.remove(temp_path)
+            try:
+                with open(temp_path, "xt", encoding="utf8") as config:
+                    self.config.write(config)
+                if os.path.exists(self.config_file_path):
+                    shutil.copymode(self.config_file_path, temp_path)
+                os.replace(temp_path, self.config_file_path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+    def schedule_save(self) -> None:
+        """Saves once no setting has changed for `SAVE_DELAY` seconds."""
+        with self.__lock:
+            if self.__save_timer:
+                self.__save_timer.cancel()
+            self.__save_timer = threading.Timer(SAVE_DELAY, self.__save_in_background)
+            self.__save_timer.daemon = True
+            self.__save_timer.start()
+
+    def __save_in_background(self) -> None:
+        # Nothing would see the exception on the timer thread
+        try:
+            self.save()
+        except Exception as exception:  # noqa
+            self.logger.error(f"Saving {self.config_file_path} failed: {exception}")
+
+    def snapshot(self, preset: Optional[str] = None) -> ExportSettings:
+        """Captures the export settings, or those of a named preset, so a running export can't be
+        changed from the UI.
+        """
+        section = f"{PRESET_PREFIX}{preset}" if preset else "DEFAULT"
+        with self.__lock:
+            return ExportSettings(
+                output_type=self.config.get(section=section, option="output_type", fallback="dng") or "dng",
+                output_directory=self.config.get(section=section, option="output_directory", fallback=""),
+                chroma_smoothing=self.config.get(section=section, option="chroma_smoothing", fallback=""),
+                proxies=self.config.getboolean(section=section, option="proxies", fallback=False),
+                audio=self.config.getboolean(section=section, option="audio", fallback=False)
+            )
+
+    @property
+    def presets(self) -> List[str]:
+        return [
+            section[len(PRESET_PREFIX):] for section in self.config.sections() if section.startswith(PRESET_PREFIX)
+        ]
+
+    def save_preset(self, name: str) -> None:
+        settings = self.snapshot()
+        with self.__lock:
+            self.config[f"{PRESET_PREFIX}{name}"] = {
+                "output_type": settings.output_type,
+                "output_directory": settings.output_directory,
+                "chroma_smoothing": settings.chroma_smoothing,
+                "proxies": str(settings.proxies).lower(),
+                "audio": str(settings.audio).lower()
+            }
+        self.schedule_save()
 
     @property
     def config(self) -> configparser.ConfigParser:
@@ -27,7 +107,9 @@ class UserConfig:
                     "output_directory": "",
                     "import_directory": "",
                     "output_type": "dng",
-                    "chroma_smoothing": ""
+                    "chroma_smoothing": "",
+                    "proxies": "false",
+                    "audio": "false"
                 }
         return self.__config
 
@@ -42,11 +124,13 @@ class UserConfig:
     def theme(self, value: Union[ThemeMode, str]) -> None:
         if isinstance(value, ThemeMode):
             value = value.value
-        self.config.set(
-            section="DEFAULT",
-            option="theme",
-            value=value
-        )
+        with self.__lock:
+            self.config.set(
+                section="DEFAULT",
+                option="theme",
+                value=value
+            )
+        self.schedule_save()
 
     @property
     def output_directory(self) -> str:
@@ -58,11 +142,13 @@ class UserConfig:
 
     @output_directory.setter
     def output_directory(self, value: str) -> None:
-        self.config.set(
-            section="DEFAULT",
-            option="output_directory",
-            value=value
-        )
+        with self.__lock:
+            self.config.set(
+                section="DEFAULT",
+                option="output_directory",
+                value=value
+            )
+        self.schedule_save()
 
     @property
     def last_import_directory(self) -> str:
@@ -74,11 +160,13 @@ class UserConfig:
 
     @last_import_directory.setter
     def last_import_directory(self, value: str) -> None:
-        self.config.set(
-            section="DEFAULT",
-            option="import_directory",
-            value=value
-        )
+        with self.__lock:
+            self.config.set(
+                section="DEFAULT",
+                option="import_directory",
+                value=value
+            )
+        self.schedule_save()
 
     @property
     def output_type(self) -> str:
@@ -90,11 +178,13 @@ class UserConfig:
 
     @output_type.setter
     def output_type(self, value: str) -> None:
-        self.config.set(
-            section="DEFAULT",
-            option="output_type",
-            value=value
-        )
+        with self.__lock:
+            self.config.set(
+                section="DEFAULT",
+                option="output_type",
+                value=value
+            )
+        self.schedule_save()
 
     @property
     def chroma_smoothing(self) -> str:
@@ -106,12 +196,50 @@ class UserConfig:
 
     @chroma_smoothing.setter
     def chroma_smoothing(self, value: str) -> None:
-        self.config.set(
+        with self.__lock:
+            self.config.set(
+                section="DEFAULT",
+                option="chroma_smoothing",
+                value=value
+            )
+        self.schedule_save()
+
+    @property
+    def proxies(self) -> bool:
+        return self.config.getboolean(
             section="DEFAULT",
-            option="chroma_smoothing",
-            value=value
+            option="proxies",
+            fallback=False
         )
 
+    @proxies.setter
+    def proxies(self, value: bool) -> None:
+        with self.__lock:
+            self.config.set(
+                section="DEFAULT",
+                option="proxies",
+                value=str(bool(value)).lower()
+            )
+        self.schedule_save()
+
+    @property
+    def audio(self) -> bool:
+        return self.config.getboolean(
+            section="DEFAULT",
+            option="audio",
+            fallback=False
+        )
+
+    @audio.setter
+    def audio(self, value: bool) -> None:
+        with self.__lock:
+            self.config.set(
+                section="DEFAULT",
+                option="audio",
+                value=str(bool(value)).lower()
+            )
+        self.schedule_save()
+
     def __repr__(self) -> str:
         settings = ", ".join(
             [f"{prop}={value if value else None}" for prop, value in self.config["DEFAULT"].items()]
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+
+from mlv_dump_ui.cache import DiskCache, file_key
+from mlv_dump_ui.config import USER_DIR
+from mlv_dump_ui.mlv import MlvClip, unpack_frame, write_still
+
+CHUNK_FRAMES = 8
+MASTER_NAME = "master.MLV"
+# Bump when `DarkFrameLibrary.key_for` changes so masters indexed under old keys are ignored
+INDEX_VERSION = 2
+
+
+def average_frames(clips: List[MlvClip], chunk_frames: int = CHUNK_FRAMES) -> numpy.ndarray:
+    """Averages every frame of `clips` reading `chunk_frames` at a time, so memory use does not grow
+    with the length or number of clips. The clips must share a resolution and bit depth.
+    """
+    raw_info = clips[0].require_raw()
+    frame_count = sum(len(clip.frames) for clip in clips)
+    if not frame_count:
+        raise ValueError(f"{os.path.basename(clips[0].path)} has no video frames")
+    total = numpy.zeros((raw_info.height, raw_info.width), dtype=numpy.uint64)
+    chunk = numpy.empty((chunk_frames, raw_info.height, raw_info.width), dtype=numpy.uint16)
+    filled = 0
+    for clip in clips:
+        for _, data in clip.iter_payloads(clip.frames):
+            chunk[filled] = unpack_frame(data=data, raw_info=raw_info)
+            filled += 1
+            if filled == chunk_frames:
+                total += chunk.sum(axis=0, dtype=numpy.uint64)
+                filled = 0
+    if filled:
+        total += chunk[:filled].sum(axis=0, dtype=numpy.uint64)
+    return ((total + frame_count // 2) // frame_count).astype(numpy.uint16)
+
+
+def group_by_key(paths: List[str]) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+    """Groups dark frame clips shot with the same settings so each group averages into one master.
+    Returns the groups by library key and the error for each clip that could not be read.
+    """
+    groups: Dict[str, List[str]] = {}
+    errors: Dict[str, str] = {}
+    for path in paths:
+        try:
+            key = DarkFrameLibrary.key_for(MlvClip(path))
+        except (OSError, ValueError, struct.error) as error:
+            errors[path] = str(error)
+            continue
+        groups.setdefault(key, []).append(path)
+    return groups, errors
+
+
+class DarkFrameLibrary:
+    """Master darks averaged from dark frame clips, indexed by camera, resolution, bit depth,
+    black level, ISO and exposure.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.cache = DiskCache(root=os.path.join(USER_DIR, "darks"))
+        self.index_path = os.path.join(self.cache.root, "index.json")
+        self.__index: Optional[Dict[str, Dict]] = None
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key_for(clip: MlvClip) -> str:
+        raw_info = clip.require_raw()
+        return (
+            f"{clip.camera_name}|{raw_info.width}x{raw_info.height}|{raw_info.bits_per_pixel}bit"
+            f"|black{raw_info.black_level}|ISO{clip.iso}|{clip.shutter}us"
+        )
+
+    @property
+    def index(self) -> Dict[str, Dict]:
+        if self.__index is None:
+            self.__index = {}
+            if os.path.exists(self.index_path):
+                try:
+                    with open(self.index_path, "rt", encoding="utf8") as index:
+                        stored = json.load(index)
+                except (OSError, ValueError) as error:
+                    # Losing the index only means rebuilding the masters, don't fail every export
+                    self.logger.error(f"Ignoring unreadable master dark index {self.index_path}: {error}")
+                    return self.__index
+                if isinstance(stored, dict) and stored.get("version") == INDEX_VERSION:
+                    self.__index = stored.get("masters", {})
+                else:
+                    self.logger.info("Ignoring master darks indexed by an older version")
+        return self.__index
+
+    def masters(self) -> List[Dict]:
+        with self.__lock:
+            return [dict(record, key=key) for key, record in sorted(self.index.items())]
+
+    def build(self, paths: List[str]) -> str:
+        """Averages the dark frame clips at `paths`, which must share a key, into one master dark,
+        reusing a cached master built from the same files.
+        """
+        clips = [MlvClip(path) for path in paths]
+        keys = {self.key_for(clip) for clip in clips}
+        if len(keys) != 1:
+            raise ValueError("Dark frame clips shot with different settings can't share a master dark")
+        key = keys.pop()
+        source = hashlib.sha1("|".join(sorted(file_key(path) for path in paths)).encode("utf8")).hexdigest()
+        entry_key = hashlib.sha1(key.encode("utf8")).hexdigest()
+        with self.__lock:
+            record = self.index.get(key)
+        if record and record["source"] == source and self.cache.get(entry_key):
+            self.logger.info(f"Using cached master dark for {key}")
+            return key
+
+        frame_count = sum(len(clip.frames) for clip in clips)
+        self.logger.info(f"Averaging {frame_count} dark frames from {', '.join(paths)}")
+        staging = self.cache.staging()
+        try:
+            write_still(path=os.path.join(staging, MASTER_NAME), clip=clips[0], image=average_frames(clips))
+        except Exception:
+            self.cache.discard(staging)
+            raise
+
+        # Replace any previous master for the same key together with its index record
+        with self.__lock:
+            self.cache.discard(self.cache.path_for(entry_key))
+            self.cache.put(key=entry_key, staging=staging)
+            self.index[key] = {
+                "entry": entry_key,
+                "source": source,
+                "source_paths": list(paths),
+                "frames": frame_count
+            }
+            self.__save_index()
+        return key
+
+    def match(self, clip: MlvClip) -> Optional[str]:
+        try:
+            key = self.key_for(clip)
+        except ValueError:
+            return None
+        with self.__lock:
+            record = self.index.get(key)
+        if not record:
+            return None
+        entry = self.cache.get(record["entry"])
+        return os.path.join(entry, MASTER_NAME) if entry else None
+
+    def __save_index(self) -> None:
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "wt", encoding="utf8") as index:
+            json.dump({"version": INDEX_VERSION, "masters": self.index}, index, indent=2)
+        os.replace(temp_path, self.index_path)
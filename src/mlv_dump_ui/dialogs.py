@@ -1,7 +1,9 @@
 import logging
 import os
+import struct
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import List, Optional
 
 from flet import icons, colors
@@ -9,12 +11,20 @@ from flet.alert_dialog import AlertDialog
 from flet.column import Column
 from flet.elevated_button import ElevatedButton
 from flet.icon import Icon
+from flet.image import Image
 from flet.list_tile import ListTile
 from flet.progress_ring import ProgressRing
+from flet.slider import Slider
 from flet.text import Text
 from flet.text_button import TextButton
 
-from mlv_dump_ui.config import UserConfig
+from mlv_dump_ui.audio import extract_wav
+from mlv_dump_ui.darks import DarkFrameLibrary, group_by_key
+from mlv_dump_ui.imaging import read_base64
+from mlv_dump_ui.jobs import ExportJob
+from mlv_dump_ui.mlv import MlvClip
+from mlv_dump_ui.previews import Preview, PREVIEW_WIDTH
+from mlv_dump_ui.proxies import ProxyWriter
 
 
 class BaseDialog(AlertDialog):
@@ -61,19 +71,141 @@ class MlvDumpVersionDialog(BaseDialog):
         self.open = True
 
 
+class PreviewDialog(BaseDialog):
+    def __init__(self, name: str, preview: Preview):
+        super().__init__()
+        self.preview = preview
+        self.title = Text(name)
+        self.image = Image(
+            src_base64=read_base64(preview.frames[0]),
+            width=PREVIEW_WIDTH,
+            fit="contain"
+        )
+        controls = [self.image]
+        if len(preview.frames) > 1:
+            controls.append(
+                Slider(
+                    min=0,
+                    max=len(preview.frames) - 1,
+                    divisions=len(preview.frames) - 1,
+                    value=0,
+                    on_change=self.scrub
+                )
+            )
+        self.content = Column(
+            tight=True,
+            controls=controls
+        )
+        self.actions = [
+            TextButton("Close", on_click=self.close)
+        ]
+        self.open = True
+
+    def scrub(self, event) -> None:
+        frame = self.preview.frames[int(float(event.control.value))]
+        try:
+            self.image.src_base64 = read_base64(frame)
+        except OSError:
+            # Evicted from the cache while open, keep showing the current frame
+            return
+        self.image.update()
+
+
+class DarkFrameDialog(BaseDialog):
+    def __init__(self, files_to_process: List[str], darks: DarkFrameLibrary, logger: logging.Logger):
+        super().__init__()
+        self.files_to_process = files_to_process
+        self.darks = darks
+        self.logger = logger
+        self.title = Text(value="Build Master Darks")
+        self.process_list = Column(
+            width=500,
+            tight=True
+        )
+        self.content = self.process_list
+        self.close_button = ElevatedButton(
+            text="Close",
+            on_click=self.close,
+            disabled=True
+        )
+        self.actions = [
+            self.close_button
+        ]
+        self.open = True
+        self.on_dismiss = self.can_dismiss
+
+    def can_dismiss(self, _) -> None:
+        if self.close_button.disabled:
+            self.open = True
+            self.page.update()
+
+    def process(self) -> None:
+        threads = []
+        # Clips shot with the same settings are averaged together instead of overwriting each other
+        groups, errors = group_by_key(self.files_to_process)
+        for path, error in errors.items():
+            self.logger.error(f"{path} Encountered error: {error}")
+            self.process_list.controls.append(
+                ListTile(
+                    title=Text(os.path.basename(path)),
+                    trailing=Icon(
+                        name=icons.ERROR,
+                        color=colors.RED,
+                    ),
+                    tooltip=error
+                )
+            )
+        with ThreadPoolExecutor() as executor:
+            for paths in groups.values():
+                name = ", ".join(os.path.basename(path) for path in paths)
+                tile = ListTile(
+                    title=Text(f"Averaging {name}"),
+                    trailing=ProgressRing()
+                )
+                self.process_list.controls.append(tile)
+                thread = executor.submit(self.darks.build, paths=paths)
+                thread.name = name
+                thread.tile = tile
+                threads.append(thread)
+            self.process_list.update()
+
+            for thread in as_completed(threads):
+                if thread.exception():
+                    self.logger.error(f"{thread.name} Encountered error: {thread.exception()}")
+                    thread.tile.trailing = Icon(
+                        name=icons.ERROR,
+                        color=colors.RED,
+                    )
+                    thread.tile.tooltip = str(thread.exception())
+                else:
+                    thread.tile.subtitle = Text(thread.result())
+                    thread.tile.trailing = Icon(
+                        name=icons.CHECK,
+                        color=colors.GREEN
+                    )
+                thread.tile.update()
+
+        self.close_button.disabled = False
+        self.update()
+
+    def start(self) -> None:
+        self.process()
+
+
 class ExportDialog(BaseDialog):
     def __init__(self,
-                 files_to_process: List[ListTile],
+                 jobs: List[ExportJob],
                  root_path: str,
                  executable: str,
-                 config: UserConfig,
+                 darks: DarkFrameLibrary,
                  logger: logging.Logger):
         super().__init__()
         self.root_path = root_path
-        self.files_to_process = files_to_process
+        self.jobs = jobs
         self.executable = executable
-        self.config = config
+        self.darks = darks
         self.logger = logger
+        self.proxy_writer: Optional[ProxyWriter] = None
         self.title = Text(value="Export MLV Files")
         self.process_list = Column(
             width=500,
@@ -96,31 +228,52 @@ class ExportDialog(BaseDialog):
             self.open = True
             self.page.update()
 
-    def __convert(self, name: str, path: str) -> None:
-        name = name.replace(".MLV", "")
+    def __master_dark(self, path: str) -> Optional[str]:
+        try:
+            if not self.darks.masters():
+                return None
+            return self.darks.match(MlvClip(path))
+        except (OSError, ValueError, struct.error) as error:
+            # Leave reporting unreadable footage to mlv_dump
+            self.logger.warning(f"Exporting {path} without a master dark: {error}")
+            return None
+
+    def __convert(self, job: ExportJob) -> None:
+        name = job.name.replace(".MLV", "")
+        settings = job.settings
+        if not settings.output_directory:
+            raise ValueError("No output directory selected")
         command = [
             os.path.join(self.root_path, "bin", self.executable)
         ]
-        self.logger.info(self.config)
-        if self.config.output_type == "raw":
+        self.logger.info(settings)
+        if settings.output_type == "raw":
             self.logger.info(f"Converting {name} into RAW")
-            command.extend(["-o", os.path.join(self.config.output_directory, name), "-r"])
-        elif self.config.output_type == "dng":
+            command.extend(["-o", os.path.join(settings.output_directory, name), "-r"])
+        elif settings.output_type == "dng":
             self.logger.info(f"Converting {name} into DNG")
-            output_dir = os.path.join(self.config.output_directory, name)
+            output_dir = os.path.join(settings.output_directory, name)
             os.makedirs(output_dir, exist_ok=False)
             command.extend(["-o", os.path.join(output_dir, name)])
-            self.logger.info(f"Made directory: {os.path.join(self.config.output_directory, name)}")
+            self.logger.info(f"Made directory: {os.path.join(settings.output_directory, name)}")
             command.append("--dng")
-            if self.config.chroma_smoothing:
-                command.append(f"--cs{self.config.chroma_smoothing}")
+            if settings.chroma_smoothing:
+                command.append(f"--cs{settings.chroma_smoothing}")
+            if settings.audio:
+                # The WAV is extracted separately, don't let mlv_dump write a second one
+                command.append("--no-audio")
 
         startupinfo = subprocess.STARTUPINFO()
         if self.page.platform == "windows":
             startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
 
+        master_dark = self.__master_dark(path=job.path)
+        if master_dark:
+            self.logger.info(f"Subtracting master dark {master_dark}")
+            command.extend(["-s", master_dark])
+
         # add input file as last arg
-        command.append(path)
+        command.append(job.path)
         self.logger.info(f"Executing command: {command}")
         subprocess.run(
             command,
@@ -130,9 +283,35 @@ class ExportDialog(BaseDialog):
             startupinfo=startupinfo
         )
 
-    def add_tile_to_list(self, name: str) -> ListTile:
+    def __write_proxies(self, job: ExportJob, conversion: Future) -> None:
+        name = job.name.replace(".MLV", "")
+        if not job.settings.output_directory:
+            raise ValueError("No output directory selected")
+        if job.settings.output_type != "dng":
+            raise ValueError("Proxies are encoded from the exported frames, export to DNG to write them")
+        proxy_dir = os.path.join(job.settings.output_directory, f"{name}_proxy")
+        self.logger.info(f"Writing proxies for {name} into {proxy_dir}")
+        converted = threading.Event()
+        conversion.add_done_callback(lambda _: converted.set())
+        self.proxy_writer.write(
+            dng_dir=os.path.join(job.settings.output_directory, name),
+            output_dir=proxy_dir,
+            finished=converted
+        )
+        if conversion.exception():
+            raise ValueError(f"The DNG export failed, proxies may be incomplete: {conversion.exception()}")
+
+    def __extract_audio(self, job: ExportJob) -> None:
+        name = job.name.replace(".MLV", "")
+        if not job.settings.output_directory:
+            raise ValueError("No output directory selected")
+        output_path = os.path.join(job.settings.output_directory, f"{name}.wav")
+        self.logger.info(f"Extracting audio from {name} into {output_path}")
+        extract_wav(path=job.path, output_path=output_path, logger=self.logger)
+
+    def add_tile_to_list(self, name: str, output_type: str) -> ListTile:
         conversion_process_tile = ListTile(
-            title=Text(f"Converting {name} to {self.config.output_type.upper()}"),
+            title=Text(f"Converting {name} to {output_type.upper()}"),
             trailing=ProgressRing()
         )
         self.process_list.controls.append(conversion_process_tile)
@@ -156,17 +335,41 @@ class ExportDialog(BaseDialog):
         tile.update()
 
     def process(self) -> None:
+        if any(job.settings.proxies for job in self.jobs):
+            with ProcessPoolExecutor() as proxy_executor:
+                self.proxy_writer = ProxyWriter(
+                    executor=proxy_executor,
+                    max_pending=2 * (os.cpu_count() or 1)
+                )
+                self.__process_jobs()
+            self.proxy_writer = None
+        else:
+            self.__process_jobs()
+
+        self.close_button.disabled = False
+        self.update()
+
+    def __process_jobs(self) -> None:
         threads = []
         with ThreadPoolExecutor() as executor:
-            for file in self.files_to_process:
-                name = file.title.value  # noqa
-                path = file.subtitle.value  # noqa
-                tile = self.add_tile_to_list(name=name)
-                # self.__convert(name=name, path=path)
-                thread = executor.submit(self.__convert, name=name, path=path)
-                thread.name = name
+            for job in self.jobs:
+                tile = self.add_tile_to_list(name=job.name, output_type=job.settings.output_type)
+                thread = executor.submit(self.__convert, job=job)
+                thread.name = job.name
                 thread.tile = tile
                 threads.append(thread)
+                if job.settings.proxies:
+                    # Submitted after its conversion, so it never holds a worker its conversion is waiting for
+                    proxy_thread = executor.submit(self.__write_proxies, job=job, conversion=thread)
+                    proxy_thread.name = f"{job.name} proxies"
+                    proxy_thread.tile = self.add_tile_to_list(name=job.name, output_type="png proxy")
+                    threads.append(proxy_thread)
+                if job.settings.audio:
+                    # Audio only copies AUDF payloads, so it runs alongside the video conversion
+                    audio_thread = executor.submit(self.__extract_audio, job=job)
+                    audio_thread.name = f"{job.name} audio"
+                    audio_thread.tile = self.add_tile_to_list(name=job.name, output_type="wav")
+                    threads.append(audio_thread)
 
             for thread in as_completed(threads):
                 if thread.exception():
@@ -181,8 +384,5 @@ class ExportDialog(BaseDialog):
                         tile=thread.tile
                     )
 
-        self.close_button.disabled = False
-        self.update()
-
     def start(self) -> None:
         self.process()
@@ -0,0 +1,111 @@
+import os
+import struct
+from typing import BinaryIO, Dict, Tuple
+
+import numpy
+
+from mlv_dump_ui.mlv import RawInfo, unpack_bits
+
+# TIFF field types that can be read, by struct format of one value
+TIFF_TYPES = {1: "B", 3: "H", 4: "I", 5: "II", 8: "h", 9: "i", 10: "ii", 13: "I"}
+
+NEW_SUBFILE_TYPE = 254
+IMAGE_WIDTH = 256
+IMAGE_LENGTH = 257
+BITS_PER_SAMPLE = 258
+COMPRESSION = 259
+PHOTOMETRIC_INTERPRETATION = 262
+STRIP_OFFSETS = 273
+SAMPLES_PER_PIXEL = 277
+STRIP_BYTE_COUNTS = 279
+TILE_OFFSETS = 324
+SUB_IFDS = 330
+BLACK_LEVEL = 50714
+WHITE_LEVEL = 50717
+
+PHOTOMETRIC_CFA = 32803
+
+Ifd = Dict[int, Tuple]
+
+
+def read_ifd(file: BinaryIO, endian: str, offset: int) -> Tuple[Ifd, int]:
+    """Reads the image file directory at `offset`, returning its tags and the offset of the next one."""
+    file.seek(offset)
+    (count,) = struct.unpack(f"{endian}H", file.read(2))
+    entries = file.read(12 * count)
+    (next_offset,) = struct.unpack(f"{endian}I", file.read(4))
+    ifd: Ifd = {}
+    for position in range(0, 12 * count, 12):
+        tag, tiff_type, value_count = struct.unpack_from(f"{endian}HHI", entries, position)
+        value_format = TIFF_TYPES.get(tiff_type)
+        if value_format is None:
+            continue
+        layout = struct.Struct(f"{endian}{value_count * len(value_format)}{value_format[0]}")
+        if layout.size <= 4:
+            values = layout.unpack_from(entries, position + 8)
+        else:
+            (value_offset,) = struct.unpack_from(f"{endian}I", entries, position + 8)
+            file.seek(value_offset)
+            values = layout.unpack(file.read(layout.size))
+        if len(value_format) == 2:
+            # Rationals
+            values = tuple(numerator / (denominator or 1) for numerator, denominator in zip(values[::2], values[1::2]))
+        ifd[tag] = values
+    return ifd, next_offset
+
+
+def read_dng(path: str) -> Tuple[numpy.ndarray, RawInfo]:
+    """Reads the uncompressed CFA image of a DNG, such as the ones mlv_dump writes, into a uint16 image."""
+    name = os.path.basename(path)
+    with open(path, "rb") as file:
+        header = file.read(8)
+        if header[:4] not in (b"II*\0", b"MM\0*"):
+            raise ValueError(f"{name} is not a DNG file")
+        endian = "<" if header[:2] == b"II" else ">"
+        (offset,) = struct.unpack(f"{endian}I", header[4:])
+
+        # Walk the IFD chain and SubIFDs, the raw image is usually a SubIFD behind a preview in IFD0
+        raw_ifd = None
+        offsets = [offset]
+        visited = set()
+        while offsets and raw_ifd is None:
+            offset = offsets.pop(0)
+            if not offset or offset in visited:
+                continue
+            visited.add(offset)
+            ifd, next_offset = read_ifd(file=file, endian=endian, offset=offset)
+            offsets.extend(ifd.get(SUB_IFDS, ()))
+            offsets.append(next_offset)
+            if ifd.get(NEW_SUBFILE_TYPE, (0,))[0] == 0 and ifd.get(PHOTOMETRIC_INTERPRETATION) == (PHOTOMETRIC_CFA,):
+                raw_ifd = ifd
+        if raw_ifd is None:
+            raise ValueError(f"{name} has no raw image")
+        if raw_ifd.get(COMPRESSION, (1,))[0] != 1 or TILE_OFFSETS in raw_ifd:
+            raise ValueError(f"{name} uses compressed or tiled raw, which cannot be decoded here")
+        if raw_ifd.get(SAMPLES_PER_PIXEL, (1,))[0] != 1:
+            raise ValueError(f"{name} has more than one sample per pixel")
+
+        width = raw_ifd[IMAGE_WIDTH][0]
+        height = raw_ifd[IMAGE_LENGTH][0]
+        bpp = raw_ifd[BITS_PER_SAMPLE][0]
+        strips = []
+        for strip_offset, strip_size in zip(raw_ifd[STRIP_OFFSETS], raw_ifd[STRIP_BYTE_COUNTS]):
+            file.seek(strip_offset)
+            strips.append(file.read(strip_size))
+    data = b"".join(strips)
+
+    # Rows are padded to whole bytes, samples of other widths are packed MSB first whatever the byte order
+    row_bytes = (width * bpp + 7) // 8
+    if len(data) < height * row_bytes:
+        raise ValueError(f"{name} is truncated")
+    if bpp == 16:
+        image = numpy.frombuffer(data, dtype=f"{endian}u2", count=width * height).astype(numpy.uint16)
+    elif bpp == 8:
+        image = numpy.frombuffer(data, dtype=numpy.uint8, count=width * height).astype(numpy.uint16)
+    else:
+        packed = numpy.frombuffer(data, dtype=numpy.uint8, count=height * row_bytes).reshape(height, row_bytes)
+        image = unpack_bits(packed=packed, bits_per_pixel=bpp, width=width)
+
+    white_level = int(raw_ifd.get(WHITE_LEVEL, ((1 << bpp) - 1,))[0])
+    black_level = int(round(min(raw_ifd.get(BLACK_LEVEL, (0,)))))
+    return image.reshape(height, width), RawInfo(width, height, bpp, black_level, white_level)
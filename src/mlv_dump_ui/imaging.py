@@ -0,0 +1,52 @@
+import base64
+import struct
+import zlib
+
+import numpy
+
+from mlv_dump_ui.mlv import RawInfo
+
+
+def debayer_half(image: numpy.ndarray, raw_info: RawInfo) -> numpy.ndarray:
+    """Collapses each RGGB quad into one 8 bit RGB pixel with a display gamma."""
+    height, width = image.shape[0] & ~1, image.shape[1] & ~1
+    quads = image[:height, :width].astype(numpy.float32)
+    rgb = numpy.empty((height // 2, width // 2, 3), dtype=numpy.float32)
+    rgb[..., 0] = quads[0::2, 0::2]
+    rgb[..., 1] = (quads[0::2, 1::2] + quads[1::2, 0::2]) * 0.5
+    rgb[..., 2] = quads[1::2, 1::2]
+    rgb -= raw_info.black_level
+    rgb /= max(raw_info.white_level - raw_info.black_level, 1)
+    numpy.clip(rgb, 0.0, 1.0, out=rgb)
+    numpy.power(rgb, 1 / 2.2, out=rgb)
+    return (rgb * 255 + 0.5).astype(numpy.uint8)
+
+
+def downscale(rgb: numpy.ndarray, max_width: int) -> numpy.ndarray:
+    step = -(-rgb.shape[1] // max_width)
+    return rgb[::step, ::step] if step > 1 else rgb
+
+
+def encode_png(rgb: numpy.ndarray, level: int = 6) -> bytes:
+    """Encodes an 8 bit (height, width, 3) array as an RGB PNG."""
+    height, width, _ = rgb.shape
+    rows = numpy.zeros((height, width * 3 + 1), dtype=numpy.uint8)
+    rows[:, 1:] = rgb.reshape(height, width * 3)
+
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data)) + chunk_type + data
+            + struct.pack(">I", zlib.crc32(chunk_type + data) & 0xFFFFFFFF)
+        )
+
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+        chunk(b"IDAT", zlib.compress(rows.tobytes(), level)),
+        chunk(b"IEND", b""),
+    ])
+
+
+def read_base64(path: str) -> str:
+    with open(path, "rb") as image:
+        return base64.b64encode(image.read()).decode("ascii")
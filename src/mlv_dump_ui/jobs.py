@@ -0,0 +1,65 @@
+from typing import Any
+
+
+class Frozen:
+    """Base for small value objects that cannot be changed once created."""
+    __slots__ = ()
+
+    def __init__(self, **values: Any):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other: Any) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self) -> str:
+        settings = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({settings})"
+
+
+class ExportSettings(Frozen):
+    """Export settings captured from `UserConfig` when an export starts."""
+    __slots__ = ("output_type", "output_directory", "chroma_smoothing", "proxies", "audio")
+
+    output_type: str
+    output_directory: str
+    chroma_smoothing: str
+    proxies: bool
+    audio: bool
+
+    def __init__(self,
+                 output_type: str,
+                 output_directory: str,
+                 chroma_smoothing: str,
+                 proxies: bool,
+                 audio: bool):
+        super().__init__(
+            output_type=output_type,
+            output_directory=output_directory,
+            chroma_smoothing=chroma_smoothing,
+            proxies=proxies,
+            audio=audio
+        )
+
+
+class ExportJob(Frozen):
+    """A single clip to export with the settings it was queued with."""
+    __slots__ = ("name", "path", "settings")
+
+    name: str
+    path: str
+    settings: ExportSettings
+
+    def __init__(self, name: str, path: str, settings: ExportSettings):
+        super().__init__(name=name, path=path, settings=settings)
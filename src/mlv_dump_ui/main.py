@@ -1,20 +1,27 @@
 import logging
+import multiprocessing
 import os
 import subprocess
 import sys
+from typing import List, Optional
 
 from flet import app, alignment, margin, ThemeMode, icons, ScrollMode
 from flet.app_bar import AppBar
 from flet.card import Card
+from flet.checkbox import Checkbox
 from flet.column import Column
 from flet.container import Container
+from flet.dropdown import Dropdown, Option
 from flet.file_picker import FilePicker, FilePickerFileType, FilePickerResultEvent
 from flet.filled_tonal_button import FilledTonalButton
 from flet.floating_action_button import FloatingActionButton
+from flet.icon import Icon
 from flet.icon_button import IconButton
+from flet.image import Image
 from flet.list_tile import ListTile
 from flet.page import Page
 from flet.popup_menu_button import PopupMenuButton, PopupMenuItem
+from flet.progress_ring import ProgressRing
 from flet.radio import Radio
 from flet.radio_group import RadioGroup
 from flet.ref import Ref
@@ -24,11 +31,26 @@ from flet.textfield import TextField
 
 try:
     from mlv_dump_ui.config import UserConfig
-    from mlv_dump_ui.dialogs import ExportDialog, NoImportsDialog, MlvDumpVersionDialog, NoOutputDirDialog
+    from mlv_dump_ui.darks import DarkFrameLibrary
+    from mlv_dump_ui.dialogs import (
+        DarkFrameDialog, ExportDialog, NoImportsDialog, MlvDumpVersionDialog, NoOutputDirDialog, PreviewDialog
+    )
+    from mlv_dump_ui.imaging import read_base64
+    from mlv_dump_ui.jobs import ExportJob
+    from mlv_dump_ui.previews import Preview, PreviewGenerator
 except ModuleNotFoundError:
     sys.path.append(os.path.join(os.getcwd(), "src"))
     from mlv_dump_ui.config import UserConfig
-    from mlv_dump_ui.dialogs import ExportDialog, NoImportsDialog, MlvDumpVersionDialog, NoOutputDirDialog
+    from mlv_dump_ui.darks import DarkFrameLibrary
+    from mlv_dump_ui.dialogs import (
+        DarkFrameDialog, ExportDialog, NoImportsDialog, MlvDumpVersionDialog, NoOutputDirDialog, PreviewDialog
+    )
+    from mlv_dump_ui.imaging import read_base64
+    from mlv_dump_ui.jobs import ExportJob
+    from mlv_dump_ui.previews import Preview, PreviewGenerator
+
+
+CURRENT_SETTINGS = "Current settings"
 
 
 class DeleteButton(IconButton):
@@ -58,10 +80,15 @@ class MlvDumpUiMain:
         self.output_directory = Ref[TextField]()
         self.output_controls = Ref[Container]()
         self.output_type_selector = Ref[RadioGroup]()
+        self.preset_selector = Ref[Dropdown]()
+        self.preset_name = Ref[TextField]()
         self.config = UserConfig(root_path=root_path)
         self.save_directory_picker = FilePicker(on_result=self.update_output_directory)
         self.import_files_picker = FilePicker(on_result=self.add_files)
+        self.dark_frames_picker = FilePicker(on_result=self.build_master_darks)
         self.logger = logging.getLogger("MLVDumpUI")
+        self.previews = PreviewGenerator(logger=self.logger)
+        self.darks = DarkFrameLibrary(logger=self.logger)
 
     def render(self) -> None:
         self.page.appbar = AppBar(
@@ -82,6 +109,10 @@ class MlvDumpUiMain:
                             text="Export",
                             on_click=self.export
                         ),
+                        PopupMenuItem(
+                            text="Build Master Darks",
+                            on_click=self.import_dark_frames
+                        ),
                         PopupMenuItem(),
                         PopupMenuItem(
                             text="Exit",
@@ -167,7 +198,7 @@ class MlvDumpUiMain:
                                         ),
                                         RadioGroup(
                                             ref=self.output_type_selector,
-                                            value="dng",
+                                            value=self.config.output_type or "dng",
                                             on_change=self.update_output_config,
                                             content=Row(
                                                 controls=[
@@ -184,11 +215,52 @@ class MlvDumpUiMain:
                                                 ]
                                             )
                                         ),
+                                        Checkbox(
+                                            label="Proxies",
+                                            value=self.config.proxies,
+                                            tooltip="Also write a half resolution *.png sequence for offline editing, "
+                                                    "encoded from the *.dng frames as they are exported",
+                                            on_change=self.update_proxies
+                                        ),
+                                        Checkbox(
+                                            label="Audio",
+                                            value=self.config.audio,
+                                            tooltip="Also extract the clip's audio into a *.wav file",
+                                            on_change=self.update_audio
+                                        ),
                                     ]
                                 ),
                                 Container(
                                     ref=self.output_controls
                                 ),
+                                Row(
+                                    controls=[
+                                        Container(
+                                            margin=margin.symmetric(horizontal=10),
+                                            content=Text("Import With: ")
+                                        ),
+                                        Dropdown(
+                                            ref=self.preset_selector,
+                                            width=200,
+                                            value=CURRENT_SETTINGS,
+                                            options=self.preset_options
+                                        ),
+                                        TextField(
+                                            ref=self.preset_name,
+                                            label="Preset Name",
+                                            expand=True
+                                        ),
+                                        Container(
+                                            margin=margin.symmetric(horizontal=5),
+                                            content=FilledTonalButton(
+                                                text="Save Preset",
+                                                icon=icons.SAVE,
+                                                tooltip="Save the current settings as a named preset",
+                                                on_click=self.save_preset
+                                            )
+                                        )
+                                    ]
+                                ),
 
                             ]
                         )
@@ -284,10 +356,26 @@ class MlvDumpUiMain:
             ]
         )
 
+    @property
+    def preset_options(self) -> List[Option]:
+        return [Option(text=CURRENT_SETTINGS)] + [Option(text=preset) for preset in self.config.presets]
+
+    def save_preset(self, _) -> None:
+        name = (self.preset_name.current.value or "").strip()
+        if not name or name == CURRENT_SETTINGS:
+            return
+        self.config.save_preset(name=name)
+        self.preset_selector.current.options = self.preset_options
+        self.preset_selector.current.value = name
+        self.preset_name.current.value = ""
+        self.preset_selector.current.update()
+        self.preset_name.current.update()
+
     def update_output_config(self, event) -> None:
         output_type = event
         if not isinstance(event, str):
             output_type = output_type.data
+            self.config.output_type = output_type
         if output_type == "dng":
             self.output_controls.current.content = self.dng_controls
         elif output_type == "raw":
@@ -304,20 +392,37 @@ class MlvDumpUiMain:
         if not self.imported_list.current.controls:
             self.page.dialog = NoImportsDialog()
             self.page.update()
-        elif not self.output_directory.current.value:
-            self.page.dialog = NoOutputDirDialog()
-            self.page.update()
-        else:
-            exporter = ExportDialog(
-                files_to_process=[item for item in self.imported_list.current.controls if isinstance(item, ListTile)],
-                root_path=self.root_path,
-                executable=self.executable,
-                config=self.config,
-                logger=self.logger
+            return
+
+        # Snapshot settings so changes in the UI don't affect a running export
+        settings = self.config.snapshot()
+        jobs = [
+            ExportJob(
+                name=item.title.value,  # noqa
+                path=item.subtitle.value,  # noqa
+                settings=self.config.snapshot(preset=item.data) if item.data else settings
             )
-            self.page.dialog = exporter
+            for item in self.imported_list.current.controls if isinstance(item, ListTile)
+        ]
+        if not all(job.settings.output_directory for job in jobs):
+            self.page.dialog = NoOutputDirDialog()
             self.page.update()
+            return
+
+        exporter = ExportDialog(
+            jobs=jobs,
+            root_path=self.root_path,
+            executable=self.executable,
+            darks=self.darks,
+            logger=self.logger
+        )
+        self.page.dialog = exporter
+        self.page.update()
+        self.previews.pause()
+        try:
             exporter.start()
+        finally:
+            self.previews.resume()
 
     def clear_imported_files(self, _) -> None:
         self.imported_list.current.controls.clear()
@@ -329,6 +434,12 @@ class MlvDumpUiMain:
     def update_chroma_smoothing(self, event) -> None:
         self.config.chroma_smoothing = event.control.value
 
+    def update_proxies(self, event) -> None:
+        self.config.proxies = event.control.value
+
+    def update_audio(self, event) -> None:
+        self.config.audio = event.control.value
+
     def switch_theme(self, theme_mode: ThemeMode) -> None:
         self.dark_mode_view.current.checked = False
         self.light_mode_view.current.checked = False
@@ -344,6 +455,7 @@ class MlvDumpUiMain:
     def exit(self, _) -> None:
         self.logger.info("Saving config")
         self.config.save()
+        self.previews.shutdown()
         self.page.window_close()
 
     def add_files(self, event: FilePickerResultEvent) -> None:
@@ -355,18 +467,64 @@ class MlvDumpUiMain:
                     self.config.last_import_directory = import_dir
 
                 # Add to list
+                preset = self.preset_selector.current.value
+                if preset == CURRENT_SETTINGS:
+                    preset = None
                 video_tile = ListTile(
                     title=Text(value=file.name),
-                    subtitle=Text(value=file.path)
+                    subtitle=Text(value=file.path),
+                    tooltip=f"Preset: {preset}" if preset else None,
+                    data=preset
                 )
                 video_tile.leading = DeleteButton(
                     parent=self,
                     list_tile=video_tile
                 )
+                video_tile.trailing = ProgressRing(width=16, height=16, stroke_width=2)
                 self.imported_list.current.controls.insert(0, video_tile)
+                self.request_preview(list_tile=video_tile)
             # Update view
             self.imported_list.current.update()
 
+    def request_preview(self, list_tile: ListTile) -> None:
+        self.previews.request(
+            path=list_tile.subtitle.value,  # noqa
+            callback=lambda preview, error: self.update_preview(
+                list_tile=list_tile, preview=preview, error=error
+            )
+        )
+
+    def update_preview(self, list_tile: ListTile, preview: Optional[Preview], error: Optional[str]) -> None:
+        if list_tile not in self.imported_list.current.controls:
+            return
+        if not error:
+            try:
+                thumbnail = read_base64(preview.thumbnail)
+            except OSError as exception:
+                error = str(exception)
+        if error:
+            list_tile.trailing = Icon(name=icons.HIDE_IMAGE, tooltip=error)
+        else:
+            list_tile.trailing = Container(
+                content=Image(src_base64=thumbnail, width=64),
+                tooltip="Preview",
+                on_click=lambda _: self.show_preview(list_tile=list_tile, preview=preview)
+            )
+        list_tile.update()
+
+    def show_preview(self, list_tile: ListTile, preview: Preview) -> None:
+        try:
+            dialog = PreviewDialog(name=list_tile.title.value, preview=preview)  # noqa
+        except OSError:
+            # The cached preview was evicted, render it again
+            self.logger.info(f"Preview for {list_tile.title.value} is gone, re-rendering")  # noqa
+            list_tile.trailing = ProgressRing(width=16, height=16, stroke_width=2)
+            list_tile.update()
+            self.request_preview(list_tile=list_tile)
+            return
+        self.page.dialog = dialog
+        self.page.update()
+
     def update_output_directory(self, event: FilePickerResultEvent) -> None:
         if event.path:
             self.output_directory.current.value = event.path
@@ -382,6 +540,30 @@ class MlvDumpUiMain:
             initial_directory=self.config.last_import_directory
         )
 
+    def import_dark_frames(self, _) -> None:
+        self.dark_frames_picker.pick_files(
+            dialog_title="Select dark frame MLV files to average",
+            allowed_extensions=["MLV", "mlv"],
+            file_type=FilePickerFileType.CUSTOM,
+            allow_multiple=True,
+            initial_directory=self.config.last_import_directory
+        )
+
+    def build_master_darks(self, event: FilePickerResultEvent) -> None:
+        if event.files:
+            builder = DarkFrameDialog(
+                files_to_process=[file.path for file in event.files],
+                darks=self.darks,
+                logger=self.logger
+            )
+            self.page.dialog = builder
+            self.page.update()
+            self.previews.pause()
+            try:
+                builder.start()
+            finally:
+                self.previews.resume()
+
     def select_output_directory(self, _) -> None:
         self.save_directory_picker.get_directory_path(
             dialog_title="Select Output Directory",
@@ -415,7 +597,7 @@ class MlvDumpUiMain:
         self.page.title = self.title
         self.executable = self.set_executable()
 
-        self.page.overlay.extend([self.save_directory_picker, self.import_files_picker])
+        self.page.overlay.extend([self.save_directory_picker, self.import_files_picker, self.dark_frames_picker])
 
         self.page.on_resize = self.on_page_resize
         self.page.on_disconnect = self.exit
@@ -429,6 +611,7 @@ class MlvDumpUiMain:
 
 
 def main() -> None:
+    multiprocessing.freeze_support()
     # make 'logs' dir if it doesn't exist
     root_path = os.path.join(os.path.dirname(os.path.abspath(__file__)))
     user_dir = os.path.join(os.path.expanduser("~"), ".mlv_dump")
@@ -0,0 +1,223 @@
+import glob
+import os
+import struct
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy
+
+BLOCK_HEADER = struct.Struct("<4sIQ")
+MLVI_HEADER = struct.Struct("<4sI8sQHHIHHIIII")
+RAWI_HEADER = struct.Struct("<HHiIiiiiiii")
+VIDF_HEADER = struct.Struct("<IHHHHI")
+AUDF_HEADER = struct.Struct("<II")
+WAVI_HEADER = struct.Struct("<HHIIHH")
+EXPO_HEADER = struct.Struct("<IIIIQ")
+IDNT_HEADER = struct.Struct("<32sI32s")
+
+VIDEO_CLASS_COMPRESSED = 0x20 | 0x40 | 0x80
+
+
+class Block(NamedTuple):
+    chunk: int
+    offset: int
+    size: int
+    number: int
+    payload_offset: int
+    payload_size: int
+
+
+class RawInfo(NamedTuple):
+    width: int
+    height: int
+    bits_per_pixel: int
+    black_level: int
+    white_level: int
+
+
+class WavInfo(NamedTuple):
+    format: int
+    channels: int
+    sampling_rate: int
+    bytes_per_second: int
+    block_align: int
+    bits_per_sample: int
+
+
+def chunk_paths(path: str) -> List[str]:
+    """Returns the MLV file followed by its spanned *.M00, *.M01, ... chunks."""
+    base, ext = os.path.splitext(path)
+    prefix = "M" if ext.isupper() else "m"
+    chunks = [
+        chunk for chunk in glob.glob(f"{glob.escape(base)}.{prefix}[0-9][0-9]")
+        if chunk[-2:].isdigit()
+    ]
+    return [path] + sorted(chunks)
+
+
+def iter_blocks(file: BinaryIO) -> Iterator[Tuple[bytes, int, int]]:
+    """Walks the block headers of a single MLV file, yielding (type, offset, size)."""
+    offset = 0
+    while True:
+        file.seek(offset)
+        header = file.read(BLOCK_HEADER.size)
+        if len(header) < BLOCK_HEADER.size:
+            return
+        block_type, block_size, _ = BLOCK_HEADER.unpack(header)
+        if block_size < BLOCK_HEADER.size:
+            return
+        yield block_type, offset, block_size
+        offset += block_size
+
+
+class MlvClip:
+    """Block index of a (possibly spanned) MLV clip built from a single scan of the block headers."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.chunks = chunk_paths(path)
+        self.video_class = 0
+        self.frame_rate = 0.0
+        self.raw_info: Optional[RawInfo] = None
+        self.wav_info: Optional[WavInfo] = None
+        self.camera_name = ""
+        self.iso = 0
+        self.shutter = 0
+        self.frames: List[Block] = []
+        self.audio: List[Block] = []
+        self.metadata: Dict[bytes, bytes] = {}
+        self.__scan()
+
+    def __scan(self) -> None:
+        for chunk, chunk_path in enumerate(self.chunks):
+            with open(chunk_path, "rb") as file:
+                for block_type, offset, size in iter_blocks(file):
+                    if block_type == b"VIDF":
+                        file.seek(offset + BLOCK_HEADER.size)
+                        number, _, _, _, _, space = VIDF_HEADER.unpack(file.read(VIDF_HEADER.size))
+                        payload_offset = offset + BLOCK_HEADER.size + VIDF_HEADER.size + space
+                        self.frames.append(
+                            Block(chunk, offset, size, number, payload_offset, offset + size - payload_offset)
+                        )
+                    elif block_type == b"AUDF":
+                        file.seek(offset + BLOCK_HEADER.size)
+                        number, space = AUDF_HEADER.unpack(file.read(AUDF_HEADER.size))
+                        payload_offset = offset + BLOCK_HEADER.size + AUDF_HEADER.size + space
+                        self.audio.append(
+                            Block(chunk, offset, size, number, payload_offset, offset + size - payload_offset)
+                        )
+                    elif chunk == 0 and block_type not in (b"NULL", b"BKUP") and block_type not in self.metadata:
+                        file.seek(offset)
+                        self.metadata[block_type] = file.read(size)
+        self.frames.sort(key=lambda block: block.number)
+        self.audio.sort(key=lambda block: block.number)
+        self.__parse_metadata()
+
+    def __parse_metadata(self) -> None:
+        header = self.metadata.get(b"MLVI")
+        if not header or not header.startswith(b"MLVI"):
+            raise ValueError(f"{self.path} is not an MLV file")
+        fields = MLVI_HEADER.unpack_from(header)
+        self.video_class = fields[7]
+        if fields[12]:
+            self.frame_rate = fields[11] / fields[12]
+
+        rawi = self.metadata.get(b"RAWI")
+        if rawi:
+            x_res, y_res, _, _, _, _, _, _, bpp, black, white = RAWI_HEADER.unpack_from(rawi, BLOCK_HEADER.size)
+            self.raw_info = RawInfo(x_res, y_res, bpp, black, white)
+
+        wavi = self.metadata.get(b"WAVI")
+        if wavi:
+            self.wav_info = WavInfo(*WAVI_HEADER.unpack_from(wavi, BLOCK_HEADER.size))
+
+        expo = self.metadata.get(b"EXPO")
+        if expo:
+            _, self.iso, _, _, self.shutter = EXPO_HEADER.unpack_from(expo, BLOCK_HEADER.size)
+
+        idnt = self.metadata.get(b"IDNT")
+        if idnt:
+            name, _, _ = IDNT_HEADER.unpack_from(idnt, BLOCK_HEADER.size)
+            self.camera_name = name.split(b"\0", 1)[0].decode("ascii", errors="replace").strip()
+
+    @property
+    def compressed(self) -> bool:
+        return bool(self.video_class & VIDEO_CLASS_COMPRESSED)
+
+    def read_payload(self, block: Block, file: Optional[BinaryIO] = None) -> bytes:
+        if file is None:
+            with open(self.chunks[block.chunk], "rb") as chunk:
+                return self.read_payload(block=block, file=chunk)
+        file.seek(block.payload_offset)
+        return file.read(block.payload_size)
+
+    def iter_payloads(self, blocks: List[Block]) -> Iterator[Tuple[Block, bytes]]:
+        """Reads each block's payload exactly once, keeping one handle open per chunk."""
+        files: Dict[int, BinaryIO] = {}
+        try:
+            for block in blocks:
+                if block.chunk not in files:
+                    files[block.chunk] = open(self.chunks[block.chunk], "rb")
+                yield block, self.read_payload(block=block, file=files[block.chunk])
+        finally:
+            for file in files.values():
+                file.close()
+
+    def read_frame(self, index: int) -> numpy.ndarray:
+        return unpack_frame(data=self.read_payload(self.frames[index]), raw_info=self.require_raw())
+
+    def require_raw(self) -> RawInfo:
+        if self.raw_info is None:
+            raise ValueError(f"{os.path.basename(self.path)} has no raw video")
+        if self.compressed:
+            raise ValueError(f"{os.path.basename(self.path)} uses compressed raw, which cannot be decoded here")
+        return self.raw_info
+
+
+def unpack_bits(packed: numpy.ndarray, bits_per_pixel: int, width: int) -> numpy.ndarray:
+    """Unpacks rows of MSB first packed samples, given as (rows, row bytes) uint8, into a uint16 image."""
+    rows = packed.shape[0]
+    bits = numpy.unpackbits(packed, axis=1)[:, :width * bits_per_pixel].reshape(rows, width, bits_per_pixel)
+    image = numpy.zeros((rows, width), dtype=numpy.uint16)
+    for bit in range(bits_per_pixel):
+        image <<= 1
+        image |= bits[..., bit]
+    return image
+
+
+def unpack_frame(data: bytes, raw_info: RawInfo) -> numpy.ndarray:
+    """Unpacks a Canon raw bitstream (MSB first across little-endian 16 bit words) into a uint16 image."""
+    bpp = raw_info.bits_per_pixel
+    pixels = raw_info.width * raw_info.height
+    words = numpy.frombuffer(data, dtype="<u2", count=(pixels * bpp + 15) // 16)
+    packed = words.astype(">u2").view(numpy.uint8).reshape(1, -1)
+    return unpack_bits(packed=packed, bits_per_pixel=bpp, width=pixels).reshape(raw_info.height, raw_info.width)
+
+
+def pack_frame(image: numpy.ndarray, raw_info: RawInfo) -> bytes:
+    """Inverse of `unpack_frame`."""
+    bpp = raw_info.bits_per_pixel
+    shifts = numpy.arange(bpp - 1, -1, -1, dtype=numpy.uint16)
+    bits = ((image.reshape(-1, 1) >> shifts) & 1).astype(numpy.uint8)
+    packed = numpy.packbits(bits.reshape(-1))
+    if packed.size % 2:
+        packed = numpy.append(packed, numpy.uint8(0))
+    return packed.view(">u2").astype("<u2").tobytes()
+
+
+def write_still(path: str, clip: MlvClip, image: numpy.ndarray) -> None:
+    """Writes `image` as a single frame MLV carrying the metadata blocks of `clip`."""
+    raw_info = clip.require_raw()
+    magic, size, version, guid, _, _, flags, video_class, _, _, _, fps_nom, fps_denom = MLVI_HEADER.unpack_from(
+        clip.metadata[b"MLVI"]
+    )
+    data = pack_frame(image=image, raw_info=raw_info)
+    with open(path, "wb") as still:
+        still.write(
+            MLVI_HEADER.pack(magic, size, version, guid, 0, 1, flags, video_class, 0, 1, 0, fps_nom, fps_denom)
+        )
+        for block_type, block in clip.metadata.items():
+            if block_type not in (b"MLVI", b"WAVI"):
+                still.write(block)
+        still.write(BLOCK_HEADER.pack(b"VIDF", BLOCK_HEADER.size + VIDF_HEADER.size + len(data), 0))
+        still.write(VIDF_HEADER.pack(0, 0, 0, 0, 0, 0))
+        still.write(data)
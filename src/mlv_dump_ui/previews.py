@@ -0,0 +1,153 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, List, NamedTuple, Optional
+
+import numpy
+
+from mlv_dump_ui.cache import DiskCache, file_key
+from mlv_dump_ui.config import USER_DIR
+from mlv_dump_ui.imaging import debayer_half, downscale, encode_png
+from mlv_dump_ui.mlv import MlvClip, unpack_frame
+
+PREVIEW_FRAMES = 24
+PREVIEW_WIDTH = 480
+THUMBNAIL_WIDTH = 96
+CACHE_BYTES = 512 * 1024 * 1024
+
+
+class Preview(NamedTuple):
+    thumbnail: str
+    frames: List[str]
+
+    @classmethod
+    def load(cls, entry: str) -> "Preview":
+        frames = sorted(
+            os.path.join(entry, name) for name in os.listdir(entry) if name.startswith("frame_")
+        )
+        return cls(thumbnail=os.path.join(entry, "thumbnail.png"), frames=frames)
+
+
+PreviewCallback = Callable[[Optional[Preview], Optional[str]], None]
+
+
+def lower_priority() -> None:
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def render_preview(path: str, staging: str, frame_count: int) -> None:
+    clip = MlvClip(path)
+    raw_info = clip.require_raw()
+    if not clip.frames:
+        raise ValueError(f"{os.path.basename(path)} has no video frames")
+    indices = numpy.unique(numpy.linspace(0, len(clip.frames) - 1, frame_count).round().astype(int))
+    blocks = [clip.frames[index] for index in indices]
+    for position, (_, data) in enumerate(clip.iter_payloads(blocks)):
+        rgb = debayer_half(image=unpack_frame(data=data, raw_info=raw_info), raw_info=raw_info)
+        if position == 0:
+            with open(os.path.join(staging, "thumbnail.png"), "wb") as thumbnail:
+                thumbnail.write(encode_png(downscale(rgb, THUMBNAIL_WIDTH)))
+        with open(os.path.join(staging, f"frame_{position:03d}.png"), "wb") as frame:
+            frame.write(encode_png(downscale(rgb, PREVIEW_WIDTH), level=1))
+
+
+class PreviewGenerator:
+    """Renders thumbnails and scrub previews for imported clips in a low priority process pool.
+
+    Requests are queued and dispatched one at a time so that `pause` takes effect as soon as the
+    in-flight previews finish, leaving the CPU and disk to running exports.
+    """
+
+    def __init__(self, logger: logging.Logger, max_workers: int = 2):
+        self.logger = logger
+        self.max_workers = max_workers
+        self.cache = DiskCache(root=os.path.join(USER_DIR, "previews"), max_bytes=CACHE_BYTES)
+        self.__executor: Optional[ProcessPoolExecutor] = None
+        self.__dispatcher: Optional[threading.Thread] = None
+        self.__jobs: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self.__slots = threading.Semaphore(max_workers)
+        self.__idle = threading.Event()
+        self.__idle.set()
+        self.__exports = 0
+        self.__lock = threading.Lock()
+
+    def request(self, path: str, callback: PreviewCallback) -> None:
+        if self.__dispatcher is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=lower_priority)
+            self.__dispatcher = threading.Thread(target=self.__dispatch, name="PreviewDispatcher", daemon=True)
+            self.__dispatcher.start()
+        self.__jobs.put((path, callback))
+
+    def pause(self) -> None:
+        with self.__lock:
+            self.__exports += 1
+            self.__idle.clear()
+
+    def resume(self) -> None:
+        with self.__lock:
+            self.__exports = max(self.__exports - 1, 0)
+            if not self.__exports:
+                self.__idle.set()
+
+    def shutdown(self) -> None:
+        if self.__dispatcher is not None:
+            self.__jobs.put(None)
+            self.__idle.set()
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def __dispatch(self) -> None:
+        while True:
+            job = self.__jobs.get()
+            if job is None:
+                return
+            path, callback = job
+            try:
+                key = file_key(path)
+            except OSError as error:
+                self.__notify(callback, None, str(error))
+                continue
+            entry = self.cache.get(key)
+            if entry:
+                self.__notify(callback, Preview.load(entry), None)
+                continue
+
+            self.__wait_for_slot()
+            staging = self.cache.staging()
+            self.logger.info(f"Rendering preview for {path}")
+            try:
+                future = self.__executor.submit(render_preview, path, staging, PREVIEW_FRAMES)
+            except RuntimeError:
+                # Executor was shut down
+                self.cache.discard(staging)
+                return
+            future.add_done_callback(partial(self.__finished, key, staging, callback))
+
+    def __wait_for_slot(self) -> None:
+        while True:
+            self.__idle.wait()
+            self.__slots.acquire()
+            # An export may have started while waiting for the slot
+            if self.__idle.is_set():
+                return
+            self.__slots.release()
+
+    def __finished(self, key: str, staging: str, callback: PreviewCallback, future: Future) -> None:
+        self.__slots.release()
+        if future.cancelled():
+            self.cache.discard(staging)
+        elif future.exception():
+            self.cache.discard(staging)
+            self.logger.error(f"Preview failed: {future.exception()}")
+            self.__notify(callback, None, str(future.exception()))
+        else:
+            self.__notify(callback, Preview.load(self.cache.put(key=key, staging=staging)), None)
+
+    def __notify(self, callback: PreviewCallback, preview: Optional[Preview], error: Optional[str]) -> None:
+        try:
+            callback(preview, error)
+        except Exception as exception:  # noqa
+            self.logger.error(f"Preview callback failed: {exception}")
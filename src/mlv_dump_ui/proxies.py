@@ -0,0 +1,85 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Deque, Set
+
+from mlv_dump_ui.dng import read_dng
+from mlv_dump_ui.imaging import debayer_half, encode_png
+
+POLL_INTERVAL = 0.25
+
+
+def encode_proxy(dng_path: str, png_path: str) -> None:
+    image, raw_info = read_dng(dng_path)
+    rgb = debayer_half(image=image, raw_info=raw_info)
+    with open(png_path, "wb") as proxy:
+        proxy.write(encode_png(rgb, level=1))
+
+
+class ProxyWriter:
+    """Writes a half resolution PNG sequence from the DNG frames mlv_dump is exporting.
+
+    The clip is read from disk once, by mlv_dump. Each DNG it finishes is handed to `executor` for
+    decoding and encoding while it is still in the OS page cache, so proxies are encoded in parallel
+    with the export. At most `max_pending` frames are in flight across all clips written with this
+    writer, so memory stays flat regardless of clip length or how many clips are exported at once.
+    """
+
+    def __init__(self, executor: Executor, max_pending: int, poll_interval: float = POLL_INTERVAL):
+        self.executor = executor
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.__slots = threading.BoundedSemaphore(max_pending)
+
+    def write(self, dng_dir: str, output_dir: str, finished: threading.Event) -> int:
+        """Encodes the DNGs appearing in `dng_dir` until `finished` is set, which must happen once
+        mlv_dump has exited. Returns the number of proxies written.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        submitted: Set[str] = set()
+        pending: Deque[Future] = deque()
+        try:
+            while True:
+                # Checked before listing, so no frame written after the listing can be missed
+                done = finished.is_set()
+                names = sorted(
+                    name for name in (os.listdir(dng_dir) if os.path.isdir(dng_dir) else [])
+                    if name.lower().endswith(".dng")
+                )
+                if not done:
+                    # mlv_dump writes frames in order, the newest one may be incomplete
+                    names = names[:-1]
+                for name in names:
+                    if name in submitted:
+                        continue
+                    submitted.add(name)
+                    self.__slots.acquire()
+                    try:
+                        future = self.executor.submit(
+                            encode_proxy,
+                            os.path.join(dng_dir, name),
+                            os.path.join(output_dir, f"{os.path.splitext(name)[0]}.png")
+                        )
+                    except BaseException:
+                        self.__slots.release()
+                        raise
+                    future.add_done_callback(self.__release)
+                    pending.append(future)
+                # Surface failures early and drop references to finished frames
+                while pending and pending[0].done():
+                    pending.popleft().result()
+                if done:
+                    break
+                finished.wait(self.poll_interval)
+            while pending:
+                pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+        if not submitted:
+            raise ValueError(f"No DNG frames were written to {dng_dir}")
+        return len(submitted)
+
+    def __release(self, _: Future) -> None:
+        self.__slots.release()
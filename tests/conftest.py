@@ -0,0 +1,131 @@
+import os
+import struct
+import sys
+import zlib
+from typing import Callable, List, NamedTuple
+
+import numpy
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from mlv_dump_ui.mlv import (  # noqa: E402
+    AUDF_HEADER, BLOCK_HEADER, EXPO_HEADER, IDNT_HEADER, MLVI_HEADER, RAWI_HEADER, RawInfo, VIDF_HEADER,
+    WAVI_HEADER, pack_frame
+)
+
+
+class SyntheticClip(NamedTuple):
+    path: str
+    chunks: List[str]
+    raw_info: RawInfo
+    frames: List[numpy.ndarray]
+    audio: List[bytes]
+
+
+def block(block_type: bytes, payload: bytes) -> bytes:
+    return BLOCK_HEADER.pack(block_type, BLOCK_HEADER.size + len(payload), 0) + payload
+
+
+def write_mlv(path: str,
+              frame_count: int = 10,
+              audio_count: int = 6,
+              chunk_count: int = 1,
+              width: int = 16,
+              height: int = 8,
+              bits_per_pixel: int = 14,
+              black_level: int = 2048,
+              iso: int = 800,
+              shutter: int = 20000,
+              seed: int = 0) -> SyntheticClip:
+    """Writes an uncompressed MLV spanned over `chunk_count` files (.MLV, .M00, ...)."""
+    rng = numpy.random.default_rng(seed)
+    raw_info = RawInfo(width, height, bits_per_pixel, black_level, (1 << bits_per_pixel) - 1)
+    frames = [
+        rng.integers(black_level, 1 << bits_per_pixel, (height, width)).astype(numpy.uint16)
+        for _ in range(frame_count)
+    ]
+    audio = [bytes([number % 256]) * 32 for number in range(audio_count)]
+    rawi = RAWI_HEADER.pack(
+        width, height, 1, 0, height, width, width * bits_per_pixel // 8, width * height * bits_per_pixel // 8,
+        bits_per_pixel, black_level, raw_info.white_level
+    )
+    metadata = b"".join([
+        block(b"RAWI", rawi + b"\0" * 124),
+        block(b"IDNT", IDNT_HEADER.pack(b"Canon EOS 5D Mark III", 0x80000285, b"0")),
+        block(b"EXPO", EXPO_HEADER.pack(0, iso, iso, 0, shutter)),
+        block(b"WAVI", WAVI_HEADER.pack(1, 2, 48000, 192000, 4, 16)),
+    ])
+
+    base = os.path.splitext(path)[0]
+    chunks = [path] + [f"{base}.M{number:02d}" for number in range(chunk_count - 1)]
+    frames_per_chunk = -(-frame_count // chunk_count)
+    audio_per_chunk = -(-audio_count // chunk_count)
+    for chunk, chunk_path in enumerate(chunks):
+        header = MLVI_HEADER.pack(
+            b"MLVI", MLVI_HEADER.size, b"v2.0\0\0\0\0", 1, chunk, chunk_count, 0, 1, 1,
+            frame_count, audio_count, 25000, 1000
+        )
+        blocks = [header, metadata if chunk == 0 else b""]
+        for number in range(chunk * frames_per_chunk, min(frame_count, (chunk + 1) * frames_per_chunk)):
+            payload = VIDF_HEADER.pack(number, 0, 0, 0, 0, 4) + b"\0" * 4 + pack_frame(frames[number], raw_info)
+            blocks.append(block(b"VIDF", payload))
+        for number in range(chunk * audio_per_chunk, min(audio_count, (chunk + 1) * audio_per_chunk)):
+            blocks.append(block(b"AUDF", AUDF_HEADER.pack(number, 2) + b"\0" * 2 + audio[number]))
+        blocks.append(block(b"NULL", b"\0" * 8))
+        with open(chunk_path, "wb") as mlv:
+            mlv.write(b"".join(blocks))
+    return SyntheticClip(path=path, chunks=chunks, raw_info=raw_info, frames=frames, audio=audio)
+
+
+def write_dng(path: str, image: numpy.ndarray, raw_info: RawInfo, endian: str = "<") -> None:
+    """Writes `image` the way mlv_dump lays out a DNG: a preview IFD0 with the uncompressed CFA image
+    in a SubIFD, samples packed MSB first in byte padded rows.
+    """
+    height, width = image.shape
+    bpp = raw_info.bits_per_pixel
+    if bpp == 16:
+        data = image.astype(f"{endian}u2").tobytes()
+    else:
+        shifts = numpy.arange(bpp - 1, -1, -1, dtype=numpy.uint16)
+        bits = ((image.reshape(height, width, 1) >> shifts) & 1).astype(numpy.uint8)
+        data = numpy.packbits(bits.reshape(height, width * bpp), axis=1).tobytes()
+
+    def ifd(entries, offset):
+        # (tag, type, format, value), all values fit in the entry
+        packed = struct.pack(f"{endian}H", len(entries))
+        for tag, tiff_type, value_format, value in entries:
+            packed += struct.pack(f"{endian}HHI", tag, tiff_type, 1)
+            packed += struct.pack(f"{endian}{value_format}", value).ljust(4, b"\0")
+        return packed + struct.pack(f"{endian}I", offset)
+
+    raw_offset = 8 + 2 + 12 * 2 + 4
+    data_offset = raw_offset + 2 + 12 * 11 + 4
+    header = (b"II*\0" if endian == "<" else b"MM\0*") + struct.pack(f"{endian}I", 8)
+    preview = ifd([(254, 4, "I", 1), (330, 4, "I", raw_offset)], 0)
+    raw = ifd([
+        (254, 4, "I", 0), (256, 4, "I", width), (257, 4, "I", height), (258, 3, "H", bpp), (259, 3, "H", 1),
+        (262, 3, "H", 32803), (273, 4, "I", data_offset), (277, 3, "H", 1), (279, 4, "I", len(data)),
+        (50714, 4, "I", raw_info.black_level), (50717, 4, "I", raw_info.white_level)
+    ], 0)
+    with open(path, "wb") as dng:
+        dng.write(header + preview + raw + data)
+
+
+def decode_png(png):
+    """Decodes the RGB PNGs written by `encode_png`, one IDAT chunk and no row filters."""
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height, depth, color_type = struct.unpack(">IIBB", png[16:26])
+    assert (depth, color_type) == (8, 2)
+    (idat_size,) = struct.unpack(">I", png[33:37])
+    assert png[37:41] == b"IDAT"
+    rows = numpy.frombuffer(zlib.decompress(png[41:41 + idat_size]), dtype=numpy.uint8).reshape(height, -1)
+    assert not rows[:, 0].any()
+    return rows[:, 1:].reshape(height, width, 3)
+
+
+@pytest.fixture
+def make_mlv(tmp_path) -> Callable[..., SyntheticClip]:
+    def make(name: str = "CLIP.MLV", **options) -> SyntheticClip:
+        return write_mlv(path=str(tmp_path / name), **options)
+    return make
@@ -0,0 +1,71 @@
+import struct
+import wave
+
+import pytest
+
+from mlv_dump_ui.audio import extract_wav
+from mlv_dump_ui.mlv import AUDF_HEADER, MLVI_HEADER, WAVI_HEADER
+
+from conftest import block
+
+
+def test_extract_wav_joins_spanned_chunks_in_order(make_mlv, tmp_path):
+    clip = make_mlv(audio_count=10, chunk_count=3)
+    output_path = str(tmp_path / "clip.wav")
+    assert extract_wav(path=clip.path, output_path=output_path) == sum(len(payload) for payload in clip.audio)
+    with wave.open(output_path) as wav:
+        assert (wav.getnchannels(), wav.getframerate(), wav.getsampwidth()) == (2, 48000, 2)
+        assert wav.readframes(wav.getnframes()) == b"".join(clip.audio)
+
+
+def write_audio_only(path, numbers):
+    header = MLVI_HEADER.pack(b"MLVI", MLVI_HEADER.size, b"v2.0\0\0\0\0", 1, 0, 1, 0, 0, 1, 0, 0, 25000, 1000)
+    blocks = [header, block(b"WAVI", WAVI_HEADER.pack(1, 1, 48000, 96000, 2, 16))]
+    blocks.extend(block(b"AUDF", AUDF_HEADER.pack(number, 0) + struct.pack("<H", number)) for number in numbers)
+    with open(path, "wb") as mlv:
+        mlv.write(b"".join(blocks))
+
+
+def test_extract_wav_reorders_blocks(tmp_path):
+    path = str(tmp_path / "SWAP.MLV")
+    write_audio_only(path, [1, 0, 3, 2, 4])
+    output_path = str(tmp_path / "swap.wav")
+    extract_wav(path=path, output_path=output_path)
+    with wave.open(output_path) as wav:
+        samples = struct.unpack("<5H", wav.readframes(5))
+    assert samples == (0, 1, 2, 3, 4)
+
+
+def test_extract_wav_reorders_blocks_across_the_clip(tmp_path):
+    path = str(tmp_path / "LATE.MLV")
+    write_audio_only(path, list(range(1, 100)) + [0])
+    output_path = str(tmp_path / "late.wav")
+    assert extract_wav(path=path, output_path=output_path) == 100 * 2
+    with wave.open(output_path) as wav:
+        assert struct.unpack("<100H", wav.readframes(100)) == tuple(range(100))
+
+
+def test_extract_wav_fills_gaps_with_silence(tmp_path):
+    path = str(tmp_path / "GAP.MLV")
+    write_audio_only(path, [1, 2, 5])
+    output_path = str(tmp_path / "gap.wav")
+    assert extract_wav(path=path, output_path=output_path) == 6 * 2
+    with wave.open(output_path) as wav:
+        assert struct.unpack("<6H", wav.readframes(6)) == (0, 1, 2, 0, 0, 5)
+
+
+def test_extract_wav_rejects_duplicate_blocks(tmp_path):
+    path = str(tmp_path / "TWICE.MLV")
+    write_audio_only(path, [0, 1, 1, 2])
+    output_path = tmp_path / "twice.wav"
+    with pytest.raises(ValueError, match="numbered 1"):
+        extract_wav(path=path, output_path=str(output_path))
+    assert not output_path.exists()
+
+
+def test_extract_wav_without_audio(make_mlv, tmp_path):
+    clip = make_mlv(audio_count=0)
+    output_path = tmp_path / "silent.wav"
+    with pytest.raises(ValueError):
+        extract_wav(path=clip.path, output_path=str(output_path))
+    assert not output_path.exists()
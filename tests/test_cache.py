@@ -0,0 +1,53 @@
+import os
+import time
+
+from mlv_dump_ui.cache import DiskCache, file_key
+
+
+def add_entry(cache, key, size):
+    staging = cache.staging()
+    with open(os.path.join(staging, "data"), "wb") as data:
+        data.write(b"\0" * size)
+    return cache.put(key=key, staging=staging)
+
+
+def test_put_and_get(tmp_path):
+    cache = DiskCache(root=str(tmp_path))
+    entry = add_entry(cache, "a", 10)
+    assert cache.get("a") == entry
+    assert cache.get("b") is None
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(".staging-")]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(root=str(tmp_path), max_bytes=250)
+    add_entry(cache, "a", 100)
+    add_entry(cache, "b", 100)
+    past = time.time() - 60
+    os.utime(cache.path_for("a"), (past - 10, past - 10))
+    os.utime(cache.path_for("b"), (past, past))
+    cache.get("a")
+    add_entry(cache, "c", 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_file_key_changes_with_contents(tmp_path):
+    path = tmp_path / "CLIP.MLV"
+    path.write_bytes(b"one")
+    key = file_key(str(path))
+    assert file_key(str(path)) == key
+    path.write_bytes(b"longer")
+    assert file_key(str(path)) != key
+
+
+def test_removes_stale_staging_directories(tmp_path):
+    cache = DiskCache(root=str(tmp_path))
+    stale = cache.staging()
+    fresh = cache.staging()
+    past = time.time() - 2 * 24 * 60 * 60
+    os.utime(stale, (past, past))
+    DiskCache(root=str(tmp_path))
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
@@ -0,0 +1,106 @@
+import logging
+import os
+
+import pytest
+
+from mlv_dump_ui import config
+from mlv_dump_ui.jobs import ExportJob, ExportSettings
+
+
+@pytest.fixture
+def user_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "USER_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "SAVE_DELAY", 0.05)
+    return config.UserConfig(root_path=str(tmp_path))
+
+
+def test_snapshot_is_immutable(user_config):
+    user_config.output_directory = "/out"
+    user_config.proxies = True
+    settings = user_config.snapshot()
+    assert settings == ExportSettings(
+        output_type="dng", output_directory="/out", chroma_smoothing="", proxies=True, audio=False
+    )
+    with pytest.raises(AttributeError):
+        settings.output_type = "raw"
+    with pytest.raises(AttributeError):
+        ExportJob(name="A.MLV", path="/in/A.MLV", settings=settings).name = "B.MLV"
+
+    user_config.output_directory = "/elsewhere"
+    assert settings.output_directory == "/out"
+
+
+def test_presets(user_config):
+    user_config.output_directory = "/out"
+    user_config.save_preset(name="half")
+    user_config.output_type = "raw"
+    user_config.audio = True
+
+    assert user_config.presets == ["half"]
+    assert user_config.snapshot(preset="half").output_type == "dng"
+    assert not user_config.snapshot(preset="half").audio
+    assert user_config.snapshot().output_type == "raw"
+
+    user_config.save()
+    reloaded = config.UserConfig(root_path="")
+    assert reloaded.snapshot(preset="half") == user_config.snapshot(preset="half")
+
+
+class FakeTimer:
+    """Stands in for `threading.Timer` so tests decide when a scheduled save runs."""
+    started = []
+
+    def __init__(self, interval, function):
+        self.function = function
+        self.cancelled = False
+        self.daemon = False
+
+    def start(self):
+        FakeTimer.started.append(self)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+@pytest.fixture
+def timers(monkeypatch):
+    FakeTimer.started = []
+    monkeypatch.setattr(config.threading, "Timer", FakeTimer)
+    return FakeTimer.started
+
+
+def test_save_is_debounced(user_config, timers):
+    user_config.output_directory = "/out"
+    user_config.output_type = "raw"
+    assert not os.path.exists(user_config.config_file_path)
+    assert [timer.cancelled for timer in timers] == [True, False]
+
+    timers[-1].function()
+    assert os.path.exists(user_config.config_file_path)
+    assert config.UserConfig(root_path="").snapshot().output_type == "raw"
+    assert [name for name in os.listdir(os.path.dirname(user_config.config_file_path))] == ["mlv_dump_config.ini"]
+
+
+def test_save_keeps_permissions(user_config):
+    user_config.save()
+    os.chmod(user_config.config_file_path, 0o640)
+    user_config.output_type = "raw"
+    user_config.save()
+    assert os.stat(user_config.config_file_path).st_mode & 0o777 == 0o640
+
+
+def test_failed_save_is_logged(user_config, timers, caplog):
+    os.makedirs(user_config.config_file_path)
+    user_config.output_type = "raw"
+    with caplog.at_level(logging.ERROR, logger="MLVDumpUI"):
+        timers[-1].function()
+    assert "mlv_dump_config.ini" in caplog.text
+    assert os.listdir(os.path.dirname(user_config.config_file_path)) == ["mlv_dump_config.ini"]
+
+
+def test_save_reports_original_error(user_config, monkeypatch):
+    def fail(*args, **kwargs):
+        raise PermissionError("read-only")
+    monkeypatch.setattr(config, "open", fail, raising=False)
+    with pytest.raises(PermissionError, match="read-only"):
+        user_config.save()
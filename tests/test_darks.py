@@ -0,0 +1,94 @@
+import logging
+
+import numpy
+import pytest
+
+from mlv_dump_ui import darks
+from mlv_dump_ui.mlv import MlvClip
+
+
+@pytest.mark.parametrize("chunk_frames", [1, 4, 8, 64])
+def test_average_frames(make_mlv, chunk_frames):
+    synthetic = make_mlv(frame_count=13, chunk_count=2)
+    expected = numpy.round(numpy.mean(numpy.stack(synthetic.frames).astype(numpy.float64), axis=0))
+    average = darks.average_frames([MlvClip(synthetic.path)], chunk_frames=chunk_frames)
+    assert average.dtype == numpy.uint16
+    assert numpy.abs(average.astype(numpy.int64) - expected).max() <= 1
+
+
+def test_average_frames_across_clips(make_mlv):
+    first = make_mlv(name="FIRST.MLV", frame_count=3)
+    second = make_mlv(name="SECOND.MLV", frame_count=5, seed=1)
+    stacked = numpy.stack(first.frames + second.frames).astype(numpy.float64)
+    average = darks.average_frames([MlvClip(first.path), MlvClip(second.path)], chunk_frames=4)
+    assert numpy.abs(average.astype(numpy.int64) - numpy.round(numpy.mean(stacked, axis=0))).max() <= 1
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr(darks, "USER_DIR", str(tmp_path / "user"))
+    return darks.DarkFrameLibrary(logger=logging.getLogger("test"))
+
+
+def test_library_matches_master(make_mlv, library):
+    dark = make_mlv(name="DARK.MLV", frame_count=5)
+    footage = make_mlv(name="FOOTAGE.MLV", seed=1)
+    assert library.match(MlvClip(footage.path)) is None
+
+    library.build([dark.path])
+    master = library.match(MlvClip(footage.path))
+    assert master is not None
+    assert (MlvClip(master).read_frame(0) == darks.average_frames([MlvClip(dark.path)])).all()
+    assert len(library.masters()) == 1
+
+
+def test_library_keys_on_bit_depth_and_black_level(make_mlv, library):
+    library.build([make_mlv(name="DARK.MLV").path])
+    assert library.match(MlvClip(make_mlv(name="TWELVE.MLV", bits_per_pixel=12).path)) is None
+    assert library.match(MlvClip(make_mlv(name="BLACK.MLV", black_level=1024).path)) is None
+    assert library.match(MlvClip(make_mlv(name="ISO.MLV", iso=1600).path)) is None
+
+
+def test_library_ignores_old_index(make_mlv, library, tmp_path):
+    library.build([make_mlv(name="DARK.MLV").path])
+    with open(library.index_path, "wt", encoding="utf8") as index:
+        index.write('{"Canon EOS 5D Mark III|16x8|ISO800|20000us": {"entry": "x", "source": "y"}}')
+    reloaded = darks.DarkFrameLibrary(logger=logging.getLogger("test"))
+    assert reloaded.masters() == []
+
+
+def test_library_ignores_corrupt_index(make_mlv, library):
+    dark = make_mlv(name="DARK.MLV")
+    library.build([dark.path])
+    with open(library.index_path, "wt", encoding="utf8") as index:
+        index.write('{"version": 2, "mas')
+    reloaded = darks.DarkFrameLibrary(logger=logging.getLogger("test"))
+    assert reloaded.masters() == []
+    assert reloaded.match(MlvClip(dark.path)) is None
+
+    reloaded.build([dark.path])
+    assert darks.DarkFrameLibrary(logger=logging.getLogger("test")).match(MlvClip(dark.path)) is not None
+
+
+def test_group_by_key(make_mlv, tmp_path):
+    first = make_mlv(name="FIRST.MLV")
+    second = make_mlv(name="SECOND.MLV", seed=1)
+    other = make_mlv(name="OTHER.MLV", iso=1600)
+    broken = tmp_path / "BROKEN.MLV"
+    broken.write_bytes(b"not an mlv")
+    groups, errors = darks.group_by_key([first.path, other.path, str(broken), second.path])
+    assert sorted(groups.values()) == [[first.path, second.path], [other.path]]
+    assert list(errors) == [str(broken)]
+
+
+def test_library_averages_clips_into_one_master(make_mlv, library):
+    first = make_mlv(name="FIRST.MLV", frame_count=3)
+    second = make_mlv(name="SECOND.MLV", frame_count=5, seed=1)
+    library.build([first.path, second.path])
+    master = library.match(MlvClip(first.path))
+    expected = darks.average_frames([MlvClip(first.path), MlvClip(second.path)])
+    assert (MlvClip(master).read_frame(0) == expected).all()
+    assert library.masters()[0]["frames"] == 8
+
+    with pytest.raises(ValueError):
+        library.build([first.path, make_mlv(name="OTHER.MLV", iso=1600).path])
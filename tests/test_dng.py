@@ -0,0 +1,27 @@
+import numpy
+import pytest
+
+from mlv_dump_ui.dng import read_dng
+from mlv_dump_ui.mlv import RawInfo
+
+from conftest import write_dng
+
+
+@pytest.mark.parametrize("endian", ["<", ">"])
+@pytest.mark.parametrize("bits_per_pixel", [10, 12, 14, 16])
+def test_read_dng(tmp_path, bits_per_pixel, endian):
+    # An odd width leaves padding at the end of packed rows
+    raw_info = RawInfo(width=13, height=6, bits_per_pixel=bits_per_pixel, black_level=128, white_level=1000)
+    image = numpy.random.default_rng(0).integers(0, 1 << bits_per_pixel, (6, 13)).astype(numpy.uint16)
+    path = str(tmp_path / "frame.dng")
+    write_dng(path, image, raw_info, endian=endian)
+    decoded, decoded_info = read_dng(path)
+    assert decoded_info == raw_info
+    assert (decoded == image).all()
+
+
+def test_read_dng_rejects_other_files(tmp_path):
+    path = tmp_path / "frame.dng"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n")
+    with pytest.raises(ValueError):
+        read_dng(str(path))
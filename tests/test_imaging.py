@@ -0,0 +1,31 @@
+import numpy
+
+from mlv_dump_ui.imaging import debayer_half, encode_png
+from mlv_dump_ui.mlv import RawInfo
+
+from conftest import decode_png
+
+
+def test_debayer_half_collapses_rggb_quads():
+    raw_info = RawInfo(width=4, height=2, bits_per_pixel=14, black_level=1000, white_level=5000)
+    image = numpy.array([
+        [5000, 1000, 1000, 3000],
+        [3000, 1000, 9000, 0],
+    ], dtype=numpy.uint16)
+    rgb = debayer_half(image=image, raw_info=raw_info)
+    assert rgb.shape == (1, 2, 3)
+    assert rgb.dtype == numpy.uint8
+    expected_green = round(255 * 0.25 ** (1 / 2.2))
+    assert rgb[0, 0].tolist() == [255, expected_green, 0]
+    # Clipped above white and below black
+    assert rgb[0, 1].tolist() == [0, 255, 0]
+
+
+def test_debayer_half_drops_odd_edges():
+    raw_info = RawInfo(width=5, height=3, bits_per_pixel=12, black_level=0, white_level=4095)
+    assert debayer_half(numpy.zeros((3, 5), dtype=numpy.uint16), raw_info).shape == (1, 2, 3)
+
+
+def test_encode_png_round_trip():
+    rgb = numpy.random.default_rng(0).integers(0, 256, (7, 5, 3)).astype(numpy.uint8)
+    assert (decode_png(encode_png(rgb, level=1)) == rgb).all()
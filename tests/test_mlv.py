@@ -0,0 +1,56 @@
+import numpy
+import pytest
+
+from mlv_dump_ui.mlv import MlvClip, RawInfo, chunk_paths, pack_frame, unpack_frame, write_still
+
+
+@pytest.mark.parametrize("bits_per_pixel", [10, 12, 14, 16])
+def test_pack_unpack_round_trip(bits_per_pixel):
+    raw_info = RawInfo(24, 6, bits_per_pixel, 0, (1 << bits_per_pixel) - 1)
+    image = numpy.random.default_rng(1).integers(0, 1 << bits_per_pixel, (6, 24)).astype(numpy.uint16)
+    assert (unpack_frame(pack_frame(image, raw_info), raw_info) == image).all()
+
+
+def test_unpack_is_msb_first_across_little_endian_words():
+    raw_info = RawInfo(8, 1, 14, 0, 16383)
+    image = numpy.arange(1, 9, dtype=numpy.uint16).reshape(1, 8)
+    data = pack_frame(image, raw_info)
+    # The first 16 bit word holds the top 14 bits of pixel 0 followed by the top 2 bits of pixel 1
+    assert int.from_bytes(data[:2], "little") == (1 << 2) | (2 >> 12)
+
+
+def test_chunk_paths_finds_spanned_files(make_mlv):
+    clip = make_mlv(chunk_count=3)
+    assert chunk_paths(clip.path) == clip.chunks
+
+
+def test_clip_reads_spanned_chunks(make_mlv):
+    synthetic = make_mlv(frame_count=11, audio_count=7, chunk_count=3)
+    clip = MlvClip(synthetic.path)
+    assert clip.raw_info == synthetic.raw_info
+    assert [frame.number for frame in clip.frames] == list(range(11))
+    assert {frame.chunk for frame in clip.frames} == {0, 1, 2}
+    assert [block.number for block in clip.audio] == list(range(7))
+    assert clip.camera_name == "Canon EOS 5D Mark III"
+    assert (clip.iso, clip.shutter, clip.frame_rate) == (800, 20000, 25.0)
+    assert not clip.compressed
+    for index, frame in enumerate(synthetic.frames):
+        assert (clip.read_frame(index) == frame).all()
+
+
+def test_clip_rejects_other_files(tmp_path):
+    path = tmp_path / "NOT.MLV"
+    path.write_bytes(b"RIFF" + b"\0" * 60)
+    with pytest.raises(ValueError):
+        MlvClip(str(path))
+
+
+def test_write_still(make_mlv, tmp_path):
+    clip = MlvClip(make_mlv().path)
+    still_path = str(tmp_path / "STILL.MLV")
+    write_still(path=still_path, clip=clip, image=clip.read_frame(3))
+    still = MlvClip(still_path)
+    assert len(still.frames) == 1
+    assert not still.audio
+    assert still.wav_info is None
+    assert (still.read_frame(0) == clip.read_frame(3)).all()
@@ -0,0 +1,52 @@
+import logging
+import os
+import struct
+import threading
+
+from mlv_dump_ui import previews
+from mlv_dump_ui.cache import DiskCache
+
+
+def png_size(path):
+    with open(path, "rb") as png:
+        header = png.read(24)
+    assert header[:8] == b"\x89PNG\r\n\x1a\n"
+    return struct.unpack(">II", header[16:24])
+
+
+def test_render_preview(make_mlv, tmp_path):
+    synthetic = make_mlv(frame_count=10, width=32, height=16)
+    cache = DiskCache(root=str(tmp_path / "cache"))
+    staging = cache.staging()
+    previews.render_preview(synthetic.path, staging, frame_count=4)
+
+    preview = previews.Preview.load(cache.put(key="clip", staging=staging))
+    assert os.path.isfile(preview.thumbnail)
+    assert len(preview.frames) == 4
+    assert [os.path.basename(frame) for frame in preview.frames] == [f"frame_{n:03d}.png" for n in range(4)]
+    assert png_size(preview.frames[0]) == (16, 8)
+
+
+def test_generator_caches_preview(make_mlv, tmp_path, monkeypatch):
+    monkeypatch.setattr(previews, "USER_DIR", str(tmp_path / "user"))
+    synthetic = make_mlv()
+    generator = previews.PreviewGenerator(logger=logging.getLogger("test"), max_workers=1)
+    results = []
+    done = threading.Event()
+
+    def callback(preview, error):
+        results.append((preview, error))
+        done.set()
+
+    try:
+        for _ in range(2):
+            done.clear()
+            generator.request(synthetic.path, callback)
+            assert done.wait(timeout=30)
+    finally:
+        generator.shutdown()
+    (first, first_error), (second, second_error) = results
+    assert first_error is None and second_error is None
+    assert first == second
+    assert os.path.isfile(first.thumbnail)
+    assert not [name for name in os.listdir(generator.cache.root) if name.startswith(".staging-")]
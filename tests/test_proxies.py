@@ -0,0 +1,71 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy
+import pytest
+
+from mlv_dump_ui.imaging import debayer_half
+from mlv_dump_ui.proxies import ProxyWriter, encode_proxy
+
+from conftest import decode_png, write_dng
+
+
+def export_dngs(synthetic, dng_dir, frames):
+    """Stands in for mlv_dump writing DNG frames."""
+    os.makedirs(dng_dir, exist_ok=True)
+    for number in frames:
+        write_dng(os.path.join(dng_dir, f"CLIP{number:06d}.dng"), synthetic.frames[number], synthetic.raw_info)
+
+
+def test_encode_proxy(make_mlv, tmp_path):
+    synthetic = make_mlv(frame_count=1, width=32, height=16)
+    export_dngs(synthetic, str(tmp_path / "CLIP"), [0])
+    png_path = str(tmp_path / "CLIP000000.png")
+    encode_proxy(str(tmp_path / "CLIP" / "CLIP000000.dng"), png_path)
+    with open(png_path, "rb") as png:
+        rgb = decode_png(png.read())
+    assert (rgb == debayer_half(synthetic.frames[0], synthetic.raw_info)).all()
+
+
+def test_writer_follows_the_export(make_mlv, tmp_path):
+    synthetic = make_mlv(frame_count=12, width=32, height=16)
+    dng_dir = str(tmp_path / "CLIP")
+    proxy_dir = str(tmp_path / "CLIP_proxy")
+    finished = threading.Event()
+    export_dngs(synthetic, dng_dir, range(5))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        writer = ProxyWriter(executor=executor, max_pending=3, poll_interval=0.01)
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            written = runner.submit(writer.write, dng_dir=dng_dir, output_dir=proxy_dir, finished=finished)
+            export_dngs(synthetic, dng_dir, range(5, 12))
+            finished.set()
+            assert written.result(timeout=30) == 12
+
+    names = sorted(os.listdir(proxy_dir))
+    assert names == [f"CLIP{number:06d}.png" for number in range(12)]
+    for name in names:
+        with open(os.path.join(proxy_dir, name), "rb") as png:
+            assert decode_png(png.read()).shape == (8, 16, 3)
+
+
+def test_writer_reports_missing_export(tmp_path):
+    finished = threading.Event()
+    finished.set()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        writer = ProxyWriter(executor=executor, max_pending=1)
+        with pytest.raises(ValueError, match="No DNG frames"):
+            writer.write(dng_dir=str(tmp_path / "missing"), output_dir=str(tmp_path / "proxy"), finished=finished)
+
+
+def test_writer_surfaces_frame_errors(tmp_path):
+    dng_dir = tmp_path / "CLIP"
+    dng_dir.mkdir()
+    (dng_dir / "CLIP000000.dng").write_bytes(numpy.zeros(16, dtype=numpy.uint8).tobytes())
+    finished = threading.Event()
+    finished.set()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        writer = ProxyWriter(executor=executor, max_pending=1)
+        with pytest.raises(ValueError, match="not a DNG"):
+            writer.write(dng_dir=str(dng_dir), output_dir=str(tmp_path / "proxy"), finished=finished)